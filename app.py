@@ -1,63 +1,129 @@
 import argparse
-import enum
+import copy
+import json
+import os
 import sys
-from functools import partial, reduce
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from string import Template
-from typing import Any, Callable, Dict, List, Optional, TypeAlias, Union
+from types import MappingProxyType
+from typing import (IO, Any, Callable, Dict, List, Mapping, Optional, Tuple,
+                    TypeAlias, Union)
+from xml.sax.saxutils import escape
 
-import tomlkit
 from flask import Blueprint, Flask, Response, current_app, request, url_for
-from pydantic import BaseModel
-from pyngrok import ngrok
-from twilio.rest import Client
 from twilio.twiml import TwiML
-from twilio.twiml.voice_response import Say, VoiceResponse
+from twilio.twiml.voice_response import Say, SsmlSayAs, VoiceResponse
 
 # ------------------------------------------------------
 # Types
 # ------------------------------------------------------
 
 
-class IVMConfig(BaseModel):
+def parse_bool(name: str, value: Any) -> bool:
+    """
+    Interpret a config value as a boolean. Accepts a bool, 0 or 1, or
+    one of the usual strings like "true", "no" or "off".
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in ("true", "yes", "on", "1"):
+            return True
+        if normalized in ("false", "no", "off", "0"):
+            return False
+    raise ValueError(f"Expected a boolean for {name}, got {value!r}")
+
+
+@dataclass(slots=True, frozen=True)
+class IVMConfig:
     twilio_account_sid: str
     twilio_auth_token: str
     use_ngrok: bool
-    ngrok_auth_token: Optional[str]
     to_number: str
     from_number: str
+    ngrok_auth_token: Optional[str] = None
     machine_voice: str = "Polly.Matthew-Neural"
     human_voice: str = "Polly.Salli-Neural"
-    variables: Dict[str, str] = {}
+    variables: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def from_mapping(cls, config: Mapping[str, Any]) -> "IVMConfig":
+        """
+        Construct from the `IVM` section of the app config, ignoring
+        unknown keys. Env vars only get JSON-decoded, so values are coerced
+        to the field types here, e.g. a phone number given as a number
+        becomes a string. Raises ValueError if required keys are missing
+        or `use_ngrok` isn't a boolean.
+        """
+        required = (
+            "twilio_account_sid",
+            "twilio_auth_token",
+            "use_ngrok",
+            "to_number",
+            "from_number",
+        )
+        missing = [key for key in required if key not in config]
+        if missing:
+            raise ValueError(f"Missing IVM config keys: {', '.join(missing)}")
+
+        # Leave out missing optional keys so that their defaults apply
+        optional = {
+            key: str(config[key])
+            for key in ("ngrok_auth_token", "machine_voice", "human_voice")
+            if config.get(key) is not None
+        }
+        variables = {
+            str(name): str(value)
+            for name, value in config.get("variables", {}).items()
+        }
+        return cls(
+            twilio_account_sid=str(config["twilio_account_sid"]),
+            twilio_auth_token=str(config["twilio_auth_token"]),
+            use_ngrok=parse_bool("use_ngrok", config["use_ngrok"]),
+            to_number=str(config["to_number"]),
+            from_number=str(config["from_number"]),
+            variables=MappingProxyType(variables),
+            **optional,
+        )
 
 
-class CallbackSideEffect(enum.Enum):
+class IVMApp(Flask):
     """
-    Common actions to take after handling user input.
+    A Flask app that also holds the parsed IVM config as an attribute,
+    which is quicker to reach from request handlers than the config dict.
     """
 
-    NOOP = enum.auto()
-    RETURN_TO_MENU = enum.auto()
-    HANGUP = enum.auto()
+    ivm: IVMConfig
 
 
-CallbackAction: TypeAlias = Callable[[VoiceResponse], CallbackSideEffect]
+# An action to take after handling user input, e.g. returning to the menu
+FollowUpAction: TypeAlias = Callable[[VoiceResponse], Any]
+CallbackAction: TypeAlias = Callable[[VoiceResponse], Optional[FollowUpAction]]
 
 
-class MenuItem(BaseModel):
+# Union of types that can be handled by our utility functions
+# when constructing TwiML
+TwiMLElement: TypeAlias = Union[str, TwiML]
+
+
+class RawTwiML(TwiML):
     """
-    Represents a choice in the interactive menu.
+    A TwiML element that has already been rendered to XML. It gets
+    written out as-is, which lets static parts of a response be built
+    once and reused.
     """
 
-    # What to say after "Press [digit]", e.g. "to hear the message again"
-    prompt: str
-    # Action to perform when this menu item is selected by the user
-    callback_action: CallbackAction
+    def __init__(self, xml: str):
+        super().__init__()
+        self.value = xml
 
-
-# Union of types that can be handled by our utility functions
-# when constructing TwiML
-LazyTwiMLBuilder = Callable[[Say], None]
-TwiMLElement: TypeAlias = Union[str, LazyTwiMLBuilder, TwiML]
+    def xml(self) -> ET.Element:
+        return ET.fromstring(self.value)
 
 
 # ------------------------------------------------------
@@ -67,15 +133,11 @@ TwiMLElement: TypeAlias = Union[str, LazyTwiMLBuilder, TwiML]
 
 def wrap_in_list(obj: Any) -> List[Any]:
     """
-    If 'obj' is a string or something non-iterable, wrap it in a list.
+    If 'obj' is not already a list or tuple, wrap it in a list.
     """
-    if isinstance(obj, str):
-        return [obj]
-    try:
-        iter(obj)
+    if isinstance(obj, (list, tuple)):
         return obj
-    except TypeError:
-        return [obj]
+    return [obj]
 
 
 def concat_consecutive_strings(elems: List[TwiMLElement]) -> List[TwiMLElement]:
@@ -84,15 +146,22 @@ def concat_consecutive_strings(elems: List[TwiMLElement]) -> List[TwiMLElement]:
     only the last string gets actually appended. Concatenate consecutive
     strings in the given list to avoid that.
     """
+    if len(elems) <= 1:
+        return elems
 
-    def reducer(acc: List[TwiMLElement], elem: TwiMLElement) -> List[TwiMLElement]:
-        if acc and isinstance(acc[-1], str) and isinstance(elem, str):
-            acc[-1] += elem
-        else:
-            acc.append(elem)
-        return acc
-
-    return reduce(reducer, elems, [])
+    result: List[TwiMLElement] = []
+    strings: List[str] = []
+    for elem in elems:
+        if isinstance(elem, str):
+            strings.append(elem)
+            continue
+        if strings:
+            result.append("".join(strings))
+            strings.clear()
+        result.append(elem)
+    if strings:
+        result.append("".join(strings))
+    return result
 
 
 def say(children: Union[TwiMLElement, List[TwiMLElement]], **kwargs) -> Say:
@@ -104,10 +173,8 @@ def say(children: Union[TwiMLElement, List[TwiMLElement]], **kwargs) -> Say:
         if isinstance(elem, str):
             rendered = render_template(elem)
             twiml.append(rendered)
-        elif isinstance(elem, TwiML):
-            twiml.append(elem)
         else:
-            elem(twiml)
+            twiml.append(elem)
     return twiml
 
 
@@ -115,7 +182,7 @@ def say_as_machine(messages: Union[TwiMLElement, List[TwiMLElement]], **kwargs)
     """
     Construct a Say element with voice set to the `machine_voice` config.
     """
-    kwargs["voice"] = current_app.config["IVM"].machine_voice
+    kwargs["voice"] = current_app.ivm.machine_voice
     return say(messages, **kwargs)
 
 
@@ -123,17 +190,103 @@ def say_as_human(messages: Union[TwiMLElement, List[TwiMLElement]], **kwargs) ->
     """
     Construct a Say element with voice set to the `human_voice` config.
     """
-    kwargs["voice"] = current_app.config["IVM"].human_voice
+    kwargs["voice"] = current_app.ivm.human_voice
     return say(messages, **kwargs)
 
 
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+
+
+@lru_cache(maxsize=1024)
+def escape_text(text: str) -> str:
+    """
+    Escape a string for use as XML character data. Like ElementTree,
+    non-ASCII characters are written as character references.
+    """
+    return escape(text).encode("ascii", "xmlcharrefreplace").decode("ascii")
+
+
+@lru_cache(maxsize=1024)
+def escape_attr(value: str) -> str:
+    """
+    Escape a string for use as a double-quoted XML attribute value,
+    writing non-ASCII characters as character references.
+    """
+    escaped = escape(value, {'"': "&quot;", "\r": "&#13;", "\n": "&#10;", "\t": "&#09;"})
+    return escaped.encode("ascii", "xmlcharrefreplace").decode("ascii")
+
+
+def write_twiml(twiml: TwiML, buf: List[str]) -> None:
+    """
+    Append the XML for the given TwiML element to `buf`. Produces the
+    same output as TwiML.to_xml(), without building an ElementTree first.
+    """
+    if isinstance(twiml, RawTwiML):
+        buf.append(twiml.value)
+        return
+
+    buf.append("<")
+    buf.append(twiml.name)
+    for key in sorted(twiml.attrs):
+        value = twiml.attrs[key]
+        value = str(value).lower() if isinstance(value, bool) else str(value)
+        buf.append(f' {key}="{escape_attr(value)}"')
+
+    text = twiml.value
+    if isinstance(text, dict):
+        text = json.dumps(text)
+    # Like TwiML.xml(), a string that follows a child element becomes
+    # the child's tail, and only the last string at each position is kept.
+    children: List[List[Any]] = []
+    for verb in twiml.verbs:
+        if isinstance(verb, str):
+            if children:
+                children[-1][1] = verb
+            else:
+                text = verb
+        else:
+            children.append([verb, None])
+
+    if not text and not children:
+        buf.append(" />")
+        return
+
+    buf.append(">")
+    if text:
+        buf.append(escape_text(text))
+    for child, tail in children:
+        write_twiml(child, buf)
+        if tail:
+            buf.append(escape_text(tail))
+    buf.append(f"</{twiml.name}>")
+
+
+def twiml_to_str(twiml: TwiML, xml_declaration: bool = True) -> str:
+    """
+    Serialize the given TwiML element, including the XML declaration
+    by default.
+    """
+    buf = [XML_DECLARATION] if xml_declaration else []
+    write_twiml(twiml, buf)
+    return "".join(buf)
+
+
 def render_twiml(resp: VoiceResponse) -> Response:
     """
     Given a VoiceResponse, render it as Flask response.
     """
-    flask_response = Response(str(resp))
-    flask_response.headers["Content-Type"] = "text/xml"
-    return flask_response
+    # Encoding up front lets Werkzeug set Content-Length without touching
+    # the body again.
+    body = twiml_to_str(resp).encode("utf-8")
+    return Response(body, content_type="text/xml", direct_passthrough=True)
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str) -> Template:
+    """
+    Construct a string.Template, reusing it for repeated strings.
+    """
+    return Template(template)
 
 
 def render_template(template: str) -> str:
@@ -141,20 +294,16 @@ def render_template(template: str) -> str:
     Render the given string a string.Template. You can reference values
     from the `variables` config by writing "$var_name".
     """
-    config = current_app.config["IVM"]
-    return Template(template).substitute(**config.variables)
+    config = current_app.ivm
+    return compile_template(template).substitute(config.variables)
 
 
-def ssml(say_attr_name: str, *args, **kwargs) -> LazyTwiMLBuilder:
+def prerendered(config_key: str) -> Callable[[], RawTwiML]:
     """
-    Return a function that, when given a Say element, invokes its
-    attribute named `say_attr_name` with the given args and kwargs.
+    Return a function that returns the TwiML element that `create_app`
+    rendered into the given config key.
     """
-
-    def call_attr(say: Say) -> None:
-        getattr(say, say_attr_name)(*args, **kwargs)
-
-    return call_attr
+    return lambda: RawTwiML(current_app.config[config_key])
 
 
 # ------------------------------------------------------
@@ -164,7 +313,9 @@ def ssml(say_attr_name: str, *args, **kwargs) -> LazyTwiMLBuilder:
 
 class DynamicMessages:
     """
-    Messages that reference config variables.
+    Messages that reference config variables. Since the config doesn't
+    change, `create_app` renders each message once; use `prerendered`
+    to get the result.
     """
 
     @staticmethod
@@ -189,117 +340,148 @@ class DynamicMessages:
         return say_as_human(
             [
                 "My email address is,",
-                ssml("say_as", email, interpret_as="spell-out"),
+                SsmlSayAs(email, interpret_as="spell-out"),
             ]
         )
 
 
+def render_menu_prompt(prompts: Dict[str, str]) -> str:
+    """
+    Render the Say element that lists the options of a menu, given
+    the prompt for each numpad key.
+    """
+    options = []
+    for index, (digits, prompt) in enumerate(prompts.items()):
+        prefix = "Please press" if index == 0 else "Press"
+        options.append(f"{prefix} {digits} {prompt}. ")
+    options.extend(
+        [
+            "Press any other key to repeat the options. ",
+            "Or, please feel free to hang up now. ",
+            "I will wait for 2 minutes before ending the call.",
+        ]
+    )
+    return twiml_to_str(say_as_machine(options, loop=1), xml_declaration=False)
+
+
 class CompositeActions:
     """
     Reusable actions to take (not necessarily in response to user input).
     """
 
     @staticmethod
-    def say_menu(
-        menu: Dict[str, MenuItem], response: VoiceResponse, external: bool = False
-    ) -> None:
-        with current_app.test_request_context(
-            base_url=current_app.config["BASE_URL"]
-        ), response.gather(
+    def say_menu(response: VoiceResponse, external: bool = False) -> None:
+        """
+        Append the interactive menu, whose prompt has been rendered
+        by `create_app`.
+        """
+        with response.gather(
             num_digits=1,
-            action=url_for("voice_message.handle_menu_callback", _external=external),
+            action=current_app.config[
+                "URL_MENU_EXTERNAL" if external else "URL_MENU_INTERNAL"
+            ],
             method="POST",
             timeout=120,
         ) as g:
-            options = []
-            for index, (digits, menu_item) in enumerate(menu.items()):
-                prefix = "Please press" if index == 0 else "Press"
-                options.append(f"{prefix} {digits} {menu_item.prompt}. ")
-            options.extend(
-                [
-                    "Press any other key to repeat the options. ",
-                    "Or, please feel free to hang up now. ",
-                    "I will wait for 2 minutes before ending the call.",
-                ]
-            )
-            g.append(say_as_machine(options, loop=1))
+            g.append(RawTwiML(current_app.config["MENU_PROMPT_XML"]))
         response.append(say_as_machine("Okay, thank you very much!"))
 
+    @staticmethod
+    def say_callback_menu(response: VoiceResponse) -> None:
+        """
+        Append the interactive menu in response to a callback from Twilio.
+        """
+        CompositeActions.say_menu(response, external=False)
+
 
 class CallbackActions:
     """
     A collection of functions that take a VoiceResponse, append
-    elements, and return what further action to take.
+    elements, and return what further action to take, if any.
     """
 
     @staticmethod
     def say_message(
-        message: Callable[[], Say], response: VoiceResponse
-    ) -> CallbackSideEffect:
+        message: Callable[[], TwiML], response: VoiceResponse
+    ) -> Optional[FollowUpAction]:
         response.append(message())
         response.pause(1)
-        return CallbackSideEffect.RETURN_TO_MENU
+        return CompositeActions.say_callback_menu
 
     @staticmethod
     def say_message_and_hangup(
-        message: Callable[[], Say], response: VoiceResponse
-    ) -> CallbackSideEffect:
+        message: Callable[[], TwiML], response: VoiceResponse
+    ) -> Optional[FollowUpAction]:
         response.append(message())
         response.pause(1)
-        return CallbackSideEffect.HANGUP
+        return VoiceResponse.hangup
 
     @staticmethod
-    def prompt_voice_reply(response: VoiceResponse) -> CallbackSideEffect:
+    def prompt_voice_reply(response: VoiceResponse) -> Optional[FollowUpAction]:
         response.append(
             say_as_machine(
                 "Please leave a reply after you hear a beep. Press the pound sign to finish recording."
             )
         )
         response.record(
-            action=url_for(".handle_voice_reply_callback"),
+            action=current_app.config["URL_VOICE_REPLY"],
             play_beep=True,
             method="POST",
             max_length=120,
-            transcribe_callback=url_for(".handle_transcribe_callback"),
+            transcribe_callback=current_app.config["URL_TRANSCRIBE"],
         )
-        return CallbackSideEffect.NOOP
+        return None
 
     @staticmethod
-    def return_to_menu(response: VoiceResponse):
-        return CallbackSideEffect.RETURN_TO_MENU
+    def return_to_menu(response: VoiceResponse) -> Optional[FollowUpAction]:
+        return CompositeActions.say_callback_menu
 
 
 def run_callback_action(action: CallbackAction, response: VoiceResponse) -> None:
     """
-    Invoke the given action and perform any side-effect specified by the action.
+    Invoke the given action and perform any follow-up action it returns.
     """
-    side_effect = action(response)
-    match side_effect:
-        case CallbackSideEffect.RETURN_TO_MENU:
-            CompositeActions.say_menu(interactive_menu, response, external=False)
-        case CallbackSideEffect.HANGUP:
-            response.hangup()
+    follow_up = action(response)
+    if follow_up is not None:
+        follow_up(response)
 
 
-# An interactive menu: a mapping from numpad keys to MenuItems.
+# An interactive menu: a mapping from numpad keys to what to say after
+# "Press [digit]", and a mapping from the same keys to the action to
+# perform when the key is pressed. The prompts are only needed for
+# rendering the menu, and the actions for handling the user's input.
 # This is pretty much coupled with other parts of the code base.
 # We could further generalize the idea of a menu constructor and
 # make it possible to define interactive menus declaratively in
 # config files or database models.
-interactive_menu = {
-    "1": MenuItem(
-        prompt="to play the message again",
-        callback_action=partial(CallbackActions.say_message, DynamicMessages.main),
-    ),
-    "2": MenuItem(
-        prompt="for the sender's email address",
-        callback_action=partial(CallbackActions.say_message, DynamicMessages.email_address),
-    ),
-    "3": MenuItem(
-        prompt="to record a voice message to be sent back",
-        callback_action=CallbackActions.prompt_voice_reply,
-    ),
+interactive_menu_prompts = {
+    "1": "to play the message again",
+    "2": "for the sender's email address",
+    "3": "to record a voice message to be sent back",
 }
+interactive_menu_actions: Dict[str, CallbackAction] = {
+    "1": partial(CallbackActions.say_message, prerendered("MAIN_XML")),
+    "2": partial(CallbackActions.say_message, prerendered("EMAIL_ADDRESS_XML")),
+    "3": CallbackActions.prompt_voice_reply,
+}
+
+
+def build_start_call_twiml() -> str:
+    """
+    Render the TwiML for initiating a call. Its content only depends on
+    the app's config, so `create_app` builds it once.
+    """
+    response = VoiceResponse()
+    response.append(prerendered("INTRO_XML")())
+    response.pause(1)
+    response.append(prerendered("MAIN_XML")())
+    response.append(prerendered("EMAIL_ADDRESS_XML")())
+    response.pause(1)
+
+    CompositeActions.say_menu(response, external=True)
+
+    return twiml_to_str(response)
+
 
 # ------------------------------------------------------
 # HTTP routes
@@ -329,23 +511,15 @@ def start_call():
     defined in the config.
     """
     client = create_twilio_client()
-
-    response = VoiceResponse()
-    response.append(DynamicMessages.intro())
-    response.pause(1)
-    response.append(DynamicMessages.main())
-    response.append(DynamicMessages.email_address())
-    response.pause(1)
-
-    CompositeActions.say_menu(interactive_menu, response, external=True)
+    twiml = current_app.config["START_CALL_TWIML"]
 
     call = client.calls.create(
-        twiml=response,
-        to=current_app.config["IVM"].to_number,
-        from_=current_app.config["IVM"].from_number,
+        twiml=twiml,
+        to=current_app.ivm.to_number,
+        from_=current_app.ivm.from_number,
     )
 
-    return f"Initiated call with SID {call.sid} with the following VoiceResponse:\n{str(response)}"
+    return f"Initiated call with SID {call.sid} with the following VoiceResponse:\n{twiml}"
 
 
 @vm.route("/menu-callback", methods=("POST",))
@@ -356,11 +530,8 @@ def handle_menu_callback():
     """
     response = VoiceResponse()
     digits = request.form["Digits"]
-    menu_item = interactive_menu.get(digits)
-    run_callback_action(
-        menu_item.callback_action if menu_item else lambda _res: CallbackSideEffect.RETURN_TO_MENU,
-        response,
-    )
+    action = interactive_menu_actions.get(digits, CallbackActions.return_to_menu)
+    run_callback_action(action, response)
     return render_twiml(response)
 
 
@@ -371,7 +542,9 @@ def handle_voice_reply_callback():
     and finished recording their reply.
     """
     response = VoiceResponse()
-    action = partial(CallbackActions.say_message_and_hangup, DynamicMessages.parting)
+    action = partial(
+        CallbackActions.say_message_and_hangup, prerendered("PARTING_XML")
+    )
     run_callback_action(action, response)
     return render_twiml(response)
 
@@ -389,35 +562,76 @@ def handle_transcribe_callback():
 # ------------------------------------------------------
 
 
+# Parsed config files, keyed by (path, mtime, size) so that an edited
+# file gets parsed again.
+_CONFIG_CACHE: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+
+
+def load_toml(f: IO[str]) -> Dict[str, Any]:
+    """
+    Parse the given TOML file, reusing the result of a previous parse
+    if the file hasn't changed since.
+    """
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+
+    stat = os.fstat(f.fileno())
+    key = (f.name, stat.st_mtime_ns, stat.st_size)
+    if key not in _CONFIG_CACHE:
+        _CONFIG_CACHE[key] = tomllib.loads(f.read())
+    # Flask merges nested tables into the app config as-is and
+    # `from_prefixed_env` mutates them, so hand out a copy.
+    return copy.deepcopy(_CONFIG_CACHE[key])
+
+
 def create_twilio_client():
-    account_sid = current_app.config["IVM"].twilio_account_sid
-    auth_token = current_app.config["IVM"].twilio_auth_token
+    # Imported here since the Twilio SDK is only needed for starting calls
+    from twilio.rest import Client
+
+    account_sid = current_app.ivm.twilio_account_sid
+    auth_token = current_app.ivm.twilio_auth_token
     return Client(account_sid, auth_token)
 
 
+def get_dev_server_port() -> int:
+    """
+    Get the dev server port. `app.run()` always listens on 5000, while
+    `flask run` can be given `--port` or the FLASK_RUN_PORT env var.
+    """
+    if os.environ.get("FLASK_RUN_FROM_CLI") != "true":
+        return 5000
+    argv = sys.argv
+    for index, arg in enumerate(argv):
+        if arg == "--port" and index + 1 < len(argv):
+            return int(argv[index + 1])
+    return int(os.environ.get("FLASK_RUN_PORT", 5000))
+
+
 def create_app(config_path: Optional[str] = None, config_dict: Optional[dict] = None):
-    app = Flask(__name__)
+    app = IVMApp(__name__)
 
     app.config.from_mapping(
         BASE_URL="http://localhost:5000",
     )
     if config_path:
-        app.config.from_file(config_path, load=tomlkit.loads)
+        app.config.from_file(config_path, load=load_toml)
     if config_dict:
         app.config.from_mapping(config_dict)
     # Env vars take precedence
     app.config.from_prefixed_env()
-    # Let Pydantic re-parse the config
-    app.config["IVM"] = IVMConfig(**app.config.get("IVM", {}))
+    # Re-parse the config into a typed, read-only object
+    app.config["IVM"] = app.ivm = IVMConfig.from_mapping(app.config.get("IVM", {}))
 
-    if app.config["IVM"].use_ngrok:
-        # Get the dev server port (defaults to 5000 for Flask, can be overridden with `--port`
-        # when starting the server
-        port = sys.argv[sys.argv.index("--port") + 1] if "--port" in sys.argv else 5000
+    if app.ivm.use_ngrok:
+        from pyngrok import ngrok
+
+        port = get_dev_server_port()
 
         # Set auth token if specified
-        if app.config["IVM"].ngrok_auth_token:
-            ngrok.set_auth_token(app.config["IVM"].ngrok_auth_token)
+        if app.ivm.ngrok_auth_token:
+            ngrok.set_auth_token(app.ivm.ngrok_auth_token)
 
         # Open an ngrok tunnel to the dev server
         public_url = ngrok.connect(port, bind_tls=True).public_url
@@ -428,6 +642,30 @@ def create_app(config_path: Optional[str] = None, config_dict: Optional[dict] =
 
     app.register_blueprint(vm)
 
+    with app.test_request_context(base_url=app.config["BASE_URL"]):
+        # Callback URLs only depend on BASE_URL, so resolve them up front
+        app.config["URL_MENU_INTERNAL"] = url_for("voice_message.handle_menu_callback")
+        app.config["URL_MENU_EXTERNAL"] = url_for(
+            "voice_message.handle_menu_callback", _external=True
+        )
+        app.config["URL_VOICE_REPLY"] = url_for(
+            "voice_message.handle_voice_reply_callback"
+        )
+        app.config["URL_TRANSCRIBE"] = url_for(
+            "voice_message.handle_transcribe_callback"
+        )
+        # The messages only depend on the config, so render them up front.
+        # This also reports missing template variables right away.
+        app.config["MENU_PROMPT_XML"] = render_menu_prompt(interactive_menu_prompts)
+        for key, build in (
+            ("INTRO_XML", DynamicMessages.intro),
+            ("PARTING_XML", DynamicMessages.parting),
+            ("MAIN_XML", DynamicMessages.main),
+            ("EMAIL_ADDRESS_XML", DynamicMessages.email_address),
+        ):
+            app.config[key] = twiml_to_str(build(), xml_declaration=False)
+        app.config["START_CALL_TWIML"] = build_start_call_twiml()
+
     return app
 
 
@@ -2,30 +2,29 @@ from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
-
-from app import create_app
-
-
-@pytest.fixture
+from twilio.twiml.voice_response import VoiceResponse
+
+from app import (IVMConfig, RawTwiML, create_app, get_dev_server_port,
+                 twiml_to_str)
+
+IVM_CONFIG = {
+    "twilio_account_sid": "a",
+    "twilio_auth_token": "b",
+    "from_number": "from",
+    "to_number": "to",
+    "use_ngrok": False,
+    "variables": {
+        "from_name": "From",
+        "subject": "Apple",
+        "main_message": "Apples are red",
+        "email": "test@example.com",
+    }
+}
+
+
+@pytest.fixture(scope="session")
 def app():
-    return create_app(
-        config_path=None,
-        config_dict={
-            "IVM": {
-                "twilio_account_sid": "a",
-                "twilio_auth_token": "b",
-                "from_number": "from",
-                "to_number": "to",
-                "use_ngrok": False,
-                "variables": {
-                    "from_name": "From",
-                    "subject": "Apple",
-                    "main_message": "Apples are red",
-                    "email": "test@example.com",
-                }
-            }
-        },
-    )
+    return create_app(config_path=None, config_dict={"IVM": IVM_CONFIG})
 
 
 @pytest.fixture
@@ -68,3 +67,159 @@ def test_trascribe_callback(client):
     res = client.post("/transcribe-callback")
     assert res.status_code == 200
     assert res.text == ""
+
+
+def test_create_app_from_config_file(tmp_path):
+    config_path = tmp_path / "config.toml"
+    config_path.write_text(
+        """
+[IVM]
+twilio_account_sid = "a"
+twilio_auth_token = "b"
+from_number = "from"
+to_number = "to"
+use_ngrok = false
+
+[IVM.variables]
+from_name = "From"
+subject = "Apple"
+main_message = "Apples are red"
+email = "test@example.com"
+"""
+    )
+
+    app = create_app(config_path=str(config_path))
+
+    assert app.config["IVM"].twilio_account_sid == "a"
+    assert app.config["IVM"].variables["from_name"] == "From"
+
+
+def test_create_app_reparses_changed_config_file(tmp_path):
+    config_path = tmp_path / "config.toml"
+    template = """
+[IVM]
+twilio_account_sid = "a"
+twilio_auth_token = "b"
+from_number = "from"
+to_number = "{to_number}"
+use_ngrok = false
+
+[IVM.variables]
+from_name = "From"
+subject = "Apple"
+main_message = "Apples are red"
+email = "test@example.com"
+"""
+    config_path.write_text(template.format(to_number="to"))
+    create_app(config_path=str(config_path))
+
+    config_path.write_text(template.format(to_number="another"))
+    app = create_app(config_path=str(config_path))
+
+    assert app.config["IVM"].to_number == "another"
+
+
+def test_twiml_to_str_matches_twilio_serializer():
+    response = VoiceResponse()
+    say = response.say(voice='"Voice" & co.\n', loop=1)
+    say.append("Tom & <Jerry> at the Café")
+    say.say_as("a@b.c", interpret_as="spell-out")
+    say.append("tail")
+    say.break_()
+    response.pause(1)
+    response.record(play_beep=True, action="/réponse")
+    response.append(RawTwiML('<Say voice="v">Pre-rendered</Say>'))
+
+    assert twiml_to_str(response) == str(response)
+    assert twiml_to_str(say, xml_declaration=False) == say.to_xml(xml_declaration=False)
+
+
+def test_get_dev_server_port_under_flask_run(monkeypatch):
+    monkeypatch.setenv("FLASK_RUN_FROM_CLI", "true")
+    monkeypatch.delenv("FLASK_RUN_PORT", raising=False)
+
+    monkeypatch.setattr("sys.argv", ["flask", "run", "--port", "8000"])
+    assert get_dev_server_port() == 8000
+
+    monkeypatch.setattr("sys.argv", ["flask", "run", "--port"])
+    assert get_dev_server_port() == 5000
+
+    monkeypatch.setattr("sys.argv", ["flask", "run"])
+    monkeypatch.setenv("FLASK_RUN_PORT", "8001")
+    assert get_dev_server_port() == 8001
+
+
+def test_get_dev_server_port_under_app_run(monkeypatch):
+    monkeypatch.delenv("FLASK_RUN_FROM_CLI", raising=False)
+    monkeypatch.setenv("FLASK_RUN_PORT", "8001")
+    monkeypatch.setattr("sys.argv", ["app.py", "--config", "config.toml"])
+
+    assert get_dev_server_port() == 5000
+
+
+def test_create_app_renders_messages_per_app(app):
+    variables = dict(IVM_CONFIG["variables"], main_message="Bananas are yellow")
+    other_app = create_app(config_dict={"IVM": dict(IVM_CONFIG, variables=variables)})
+
+    with app.test_client() as test_client:
+        res = test_client.post("/menu-callback", data={"Digits": "1"})
+    assert "Apples are red" in res.text
+    with other_app.test_client() as test_client:
+        res = test_client.post("/menu-callback", data={"Digits": "1"})
+    assert "Bananas are yellow" in res.text
+
+
+def test_create_app_fails_on_missing_template_variable():
+    variables = {k: v for k, v in IVM_CONFIG["variables"].items() if k != "subject"}
+
+    with pytest.raises(KeyError, match="subject"):
+        create_app(config_dict={"IVM": dict(IVM_CONFIG, variables=variables)})
+
+
+def test_ivm_config_from_mapping_applies_defaults_and_ignores_unknown_keys():
+    config = IVMConfig.from_mapping(
+        {
+            "twilio_account_sid": "a",
+            "twilio_auth_token": "b",
+            "use_ngrok": False,
+            "to_number": 15551234567,
+            "from_number": "from",
+            "ngrok_enabled": True,
+        }
+    )
+
+    assert config.to_number == "15551234567"
+    assert config.ngrok_auth_token is None
+    assert config.machine_voice == "Polly.Matthew-Neural"
+    assert config.human_voice == "Polly.Salli-Neural"
+    assert config.variables == {}
+    assert not hasattr(config, "ngrok_enabled")
+
+
+def test_ivm_config_from_mapping_reports_all_missing_keys():
+    with pytest.raises(ValueError, match="twilio_auth_token, use_ngrok, to_number"):
+        IVMConfig.from_mapping({"twilio_account_sid": "a", "from_number": "from"})
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (True, True),
+        (False, False),
+        ("true", True),
+        ("Yes", True),
+        ("False", False),
+        ("no", False),
+        ("off", False),
+        (1, True),
+        (0, False),
+    ],
+)
+def test_ivm_config_from_mapping_coerces_use_ngrok(value, expected):
+    config = IVMConfig.from_mapping(dict(IVM_CONFIG, use_ngrok=value))
+    assert config.use_ngrok is expected
+
+
+def test_ivm_config_from_mapping_rejects_non_boolean_use_ngrok():
+    with pytest.raises(ValueError, match="use_ngrok"):
+        IVMConfig.from_mapping(dict(IVM_CONFIG, use_ngrok="maybe"))